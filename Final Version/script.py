@@ -6,15 +6,22 @@ measuring performance metrics and validating functionality.
 '''
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import aiohttp
+import asyncio
+import functools
+import orjson
 import sys
-import subprocess
 import time
 import pandas as pd
+import matplotlib
+# Select the headless Agg backend before pyplot loads so test runners
+# never initialize a GUI toolkit
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import seaborn as sns
 import socket
 
 # Server configuration constants
@@ -26,27 +33,58 @@ Server URLs:
 SERVER_URL = "http://localhost:3000"
 PROXY_URL = "http://localhost:8080"
 
+# Shared keep-alive session
+'''
+SESSION: Single requests.Session reused by every helper so repeated
+same-host calls reuse an already-open TCP connection instead of paying
+a fresh handshake per request.
+'''
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# HTTP/2-capable client for the concurrent paths
+'''
+HTTP2_CLIENT: httpx client with HTTP/2 multiplexing so concurrent POSTs
+share one connection instead of opening one socket each. Falls back to
+the plain requests SESSION when httpx (or its h2 extra) is missing.
+The clients name the pre-serialized body kwarg differently (httpx wants
+content=, requests wants data=), so POST_BODY_KWARG carries the right
+one for whichever client was selected.
+'''
+try:
+    import httpx
+    HTTP2_CLIENT = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+    )
+    POST_BODY_KWARG = 'content'
+except ImportError:
+    HTTP2_CLIENT = SESSION
+    POST_BODY_KWARG = 'data'
+
 # Performance tracking data structure
 '''
-performance_data: Dictionary to store performance metrics
-- operation: Type of operation being performed
-- response_time: Time taken for the operation
-- status_code: HTTP status code returned
-- timestamp: When the operation was performed
-- cache_hit: Whether the request was served from cache
+PERF_ROWS: List of per-request observation tuples, one tuple per request:
+(operation, response_time, status_code, timestamp, cache_hit)
+where timestamp is a time.monotonic_ns() integer, converted to a
+relative-time datetime axis in one vectorized pass at reporting time
+
+Buffering rows as tuples keeps logging to a single list.append and defers
+DataFrame construction until reporting time.
 '''
-performance_data = {
-    'operation': [],
-    'response_time': [],
-    'status_code': [],
-    'timestamp': [],
-    'cache_hit': []
-}
+PERF_COLUMNS = ['operation', 'response_time', 'status_code', 'timestamp', 'cache_hit']
+PERF_ROWS: list[tuple] = []
 
+@functools.lru_cache(maxsize=1)
 def get_local_ip():
     """
     Get local IP address in a cross-platform way
-    
+
+    The result is cached for the lifetime of the run, since the local IP
+    does not change mid-test, so only the first call pays for the socket.
+
     Returns:
         str: Local IP address or 'localhost' if unable to determine
     """
@@ -63,128 +101,197 @@ def get_local_ip():
         return "localhost"
 
 def log_request(operation, response_time, status_code, cache_hit=False):
-    performance_data['operation'].append(operation)
-    performance_data['response_time'].append(response_time)
-    performance_data['status_code'].append(status_code)
-    performance_data['timestamp'].append(datetime.now())
-    performance_data['cache_hit'].append(cache_hit)
+    PERF_ROWS.append((operation, response_time, status_code, time.monotonic_ns(), cache_hit))
 
-def check_server_status():
-    """Check if both servers are running with detailed error handling"""
+def _probe(url, host_header=None):
+    """
+    Probe a single endpoint with a short timeout
+
+    Returns:
+        tuple: (ok, result, elapsed) where result is the Response on
+        success or the raised exception on failure
+    """
+    headers = {'Host': host_header} if host_header else None
+    start_time = time.time()
     try:
-        print("\nTesting Express server connectivity...")
-        start_time = time.time()
-        response = requests.get(f"{SERVER_URL}/test", timeout=2)
-        elapsed_time = time.time() - start_time
-        log_request('server_status_check', elapsed_time, response.status_code)
-        
-        if response.status_code == 200:
-            print(f"✓ Express server is running (Response: {response.text})")
-        else:
-            print(f"✗ Express server returned unexpected status: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("✗ Cannot connect to Express server")
-        return False
-    except requests.exceptions.Timeout:
-        print("✗ Express server connection timed out")
-        return False
+        response = SESSION.get(url, timeout=2, headers=headers)
+        return True, response, time.time() - start_time
     except requests.exceptions.RequestException as e:
-        print(f"✗ Express server error: {str(e)}")
-        return False
+        return False, e, time.time() - start_time
 
-    try:
-        print("\nTesting proxy server connectivity...")
-        start_time = time.time()
-        response = requests.get(f"{PROXY_URL}/test", timeout=2, headers={'Host': 'localhost:3000'})
-        elapsed_time = time.time() - start_time
-        log_request('proxy_status_check', elapsed_time, response.status_code)
-        
-        if response.status_code == 200:
-            print(f"✓ Proxy server is running (Response: {response.text})")
+def check_server_status():
+    """Check if both servers are running with detailed error handling"""
+    print("\nTesting Express and proxy server connectivity in parallel...")
+
+    # The two probes are independent, so run them concurrently; worst-case
+    # wall time is max(t1, t2) instead of t1 + t2
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        express_future = executor.submit(_probe, f"{SERVER_URL}/test")
+        proxy_future = executor.submit(_probe, f"{PROXY_URL}/test", 'localhost:3000')
+        probes = [
+            ('Express', 'server_status_check', express_future.result()),
+            ('Proxy', 'proxy_status_check', proxy_future.result()),
+        ]
+
+    all_ok = True
+    for name, operation, (ok, result, elapsed_time) in probes:
+        if not ok:
+            if isinstance(result, requests.exceptions.ConnectionError):
+                print(f"✗ Cannot connect to {name} server")
+            elif isinstance(result, requests.exceptions.Timeout):
+                print(f"✗ {name} server connection timed out")
+            else:
+                print(f"✗ {name} server error: {str(result)}")
+            all_ok = False
+            continue
+
+        log_request(operation, elapsed_time, result.status_code)
+        if result.status_code == 200:
+            print(f"✓ {name} server is running (Response: {result.text})")
         else:
-            print(f"✗ Proxy server returned unexpected status: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("✗ Cannot connect to proxy server")
-        return False
-    except requests.exceptions.Timeout:
-        print("✗ Proxy server connection timed out")
-        return False
-    except requests.exceptions.RequestException as e:
-        print(f"✗ Proxy server error: {str(e)}")
-        return False
+            print(f"✗ {name} server returned unexpected status: {result.status_code}")
+            all_ok = False
 
-    return True
+    return all_ok
 
-def test_large_request(num_requests=3, size_mb=10):
+def test_large_request(num_requests=3, size_mb=10, concurrency=8):
     """Test large request handling and caching performance"""
     print(f"\nTesting large request ({size_mb}MB) through proxy...")
+    print(f"Making {num_requests} requests: first serial, rest concurrent "
+          f"(max {concurrency} in flight)...")
     headers = {'Host': 'localhost:3000'}
+
+    async def run_requests():
+        # Per-task timings are buffered here and only merged into the shared
+        # performance data once the event loop has drained
+        timings = []
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=64, keepalive_timeout=30)
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            loop = asyncio.get_running_loop()
+
+            # Untimed warmup hits /test so DNS resolution and the TCP
+            # handshake are paid before any measurement. /large stays
+            # untouched: the cold-fetch mode relies on request 1 running
+            # serially below, which guarantees it misses and primes the
+            # cache for the concurrent remainder
+            try:
+                async with session.get(
+                    f"{PROXY_URL}/test",
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as warmup:
+                    await warmup.read()
+                print("Warmup done; mode: request 1 measures a cold fetch and "
+                      "primes the cache, remaining requests measure warm hits")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Warmup request failed: {str(e)}")
+
+            async def do_req(i):
+                async with semaphore:
+                    start_time = loop.time()
+                    try:
+                        async with session.get(
+                            f"{PROXY_URL}/large",
+                            headers=headers,
+                            timeout=aiohttp.ClientTimeout(total=10)
+                        ) as response:
+                            # Stream and count instead of materializing the
+                            # whole 10MB body; only one 64KB chunk is live
+                            # at a time
+                            total = 0
+                            async for chunk in response.content.iter_chunked(65536):
+                                total += len(chunk)
+                            elapsed_time = loop.time() - start_time
+
+                            if response.status != 200:
+                                print(f"✗ Request {i+1} failed with status {response.status}")
+                                return
+
+                            timings.append({
+                                'request_number': i + 1,
+                                'time': elapsed_time,
+                                'cache_hit': i > 0,  # Request 1 completes alone, so the rest hit the cache
+                                'status_code': response.status,
+                                'size': total
+                            })
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        print(f"✗ Request {i+1} failed: {str(e)}")
+
+            # The proxy only populates its cache after a miss finishes, so
+            # run request 1 to completion before the rest launch; otherwise
+            # every concurrent request would be a cold fetch mislabeled as
+            # a hit
+            await do_req(0)
+            if num_requests > 1:
+                await asyncio.gather(*[do_req(i) for i in range(1, num_requests)])
+
+        return timings
+
+    timings = asyncio.run(run_requests())
+
+    # Batch-append the buffered observations in one pass now that no tasks
+    # are running, instead of touching the shared performance log mid-flight
     results = []
-    
-    for i in range(num_requests):
-        print(f"Request {i+1}/{num_requests}...")
-        start_time = time.time()
-        try:
-            response = requests.get(f"{PROXY_URL}/large", headers=headers, timeout=10)
-            elapsed_time = time.time() - start_time
-            
-            if response.status_code != 200:
-                print(f"✗ Request {i+1} failed with status {response.status_code}")
-                continue
-            
-            cache_hit = i > 0  # First request is always a cache miss
-            log_request(
-                f'large_request_{"cached" if cache_hit else "nocache"}', 
-                elapsed_time, 
-                response.status_code,
-                cache_hit
-            )
-            
-            print(f"Request {i+1} time: {elapsed_time:.4f} seconds")
-            print(f"Response size: {len(response.content) / (1024 * 1024):.2f} MB")
-            
-            results.append({
-                'request_number': i + 1,
-                'time': elapsed_time,
-                'cache_hit': cache_hit,
-                'status_code': response.status_code
-            })
-            
-            # Add small delay between requests
-            time.sleep(0.5)
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Request {i+1} failed: {str(e)}")
-            continue
-    
+    for entry in sorted(timings, key=lambda t: t['request_number']):
+        cache_hit = entry['cache_hit']
+        log_request(
+            f'large_request_{"cached" if cache_hit else "nocache"}',
+            entry['time'],
+            entry['status_code'],
+            cache_hit
+        )
+
+        print(f"Request {entry['request_number']} time: {entry['time']:.4f} seconds")
+        print(f"Response size: {entry['size'] / (1024 * 1024):.2f} MB")
+
+        results.append({
+            'request_number': entry['request_number'],
+            'time': entry['time'],
+            'cache_hit': cache_hit,
+            'status_code': entry['status_code']
+        })
+
     return results
 
 def create_test_users(num_users=5):
     print(f"\nCreating {num_users} test users...")
-    created_users = []
-    
-    for i in range(num_users):
-        user_data = {
+    headers = {'Content-Type': 'application/json'}
+    users_data = [
+        {
             "id": str(i + 1),
             "name": f"Test User {i + 1}",
             "email": f"user{i + 1}@example.com"
         }
-        headers = {'Content-Type': 'application/json'}
-        
+        for i in range(num_users)
+    ]
+
+    def post_user(user_data):
         start_time = time.time()
-        response = requests.post(
+        # Serialize with orjson up front instead of letting the client
+        # run stdlib json.dumps on the json= kwarg
+        response = HTTP2_CLIENT.post(
             f"{SERVER_URL}/users",
-            json=user_data,
-            headers=headers
+            headers=headers,
+            **{POST_BODY_KWARG: orjson.dumps(user_data)}
         )
-        elapsed_time = time.time() - start_time
+        return time.time() - start_time, response
+
+    # The POSTs are independent, so issue them from a bounded worker pool;
+    # the session's adapter pool hands each worker its own connection and
+    # executor.map keeps results in submission order
+    with ThreadPoolExecutor(max_workers=min(num_users, 8)) as executor:
+        results = list(executor.map(post_user, users_data))
+
+    created_users = []
+    for i, (elapsed_time, response) in enumerate(results):
         log_request('create_user', elapsed_time, response.status_code)
-        
+
         if response.status_code == 201:
             created_users.append(response.json())
             print(f"Created user {i + 1}")
-    
+
     return created_users
 
 def get_users():
@@ -192,7 +299,7 @@ def get_users():
     headers = {'Host': 'localhost:3000'}
     
     start_time = time.time()
-    response = requests.get(f"{PROXY_URL}/users", headers=headers)
+    response = SESSION.get(f"{PROXY_URL}/users", headers=headers)
     elapsed_time = time.time() - start_time
     
     log_request('get_users', elapsed_time, response.status_code)
@@ -214,29 +321,35 @@ def get_users():
 #        log_request('delete_user', elapsed_time, response.status_code)
 #        print(f"Deleted user {user_id}")
 
-def generate_performance_graphs():
-    """Generate comprehensive performance visualization"""
-    df = pd.DataFrame(performance_data)
-    
+def generate_performance_graphs(df, cache_data):
+    """
+    Generate comprehensive performance visualization
+
+    Args:
+        df: DataFrame of all observations, built once by the caller
+        cache_data: View of df holding only the large-request rows
+    """
+    # One float32 copy of the response times, shared by every subplot;
+    # half the bytes of float64 and ample precision for screen plots
+    rt = df['response_time'].to_numpy(dtype=np.float32)
+
     # Use a clean, built-in style
     plt.style.use('bmh')
-    
+
     # Create multiple subplots
     fig, axes = plt.subplots(3, 2, figsize=(18, 15))
     fig.suptitle('Proxy Server Performance Analysis', fontsize=16)
-    
+
     # 1. Cache Performance Comparison
-    cache_data = df[df['operation'].str.contains('large_request')]
-    
-    # Calculate statistics
-    stats = cache_data.groupby('operation')['response_time'].agg(['mean', 'std']).reset_index()
-    
+    # Calculate statistics in a single groupby pass
+    stats = cache_data.groupby('operation', observed=True)['response_time'].agg(['mean', 'std'])
+
     # Bar plot for cache performance
     ax = axes[0, 0]
     bars = ax.bar(
         ['First Request', 'Cached Requests'],
-        stats['mean'],
-        yerr=stats['std'],
+        [stats.loc['large_request_nocache', 'mean'], stats.loc['large_request_cached', 'mean']],
+        yerr=[stats.loc['large_request_nocache', 'std'], stats.loc['large_request_cached', 'std']],
         color=['lightcoral', 'lightgreen'],
         capsize=5
     )
@@ -252,8 +365,8 @@ def generate_performance_graphs():
                 ha='center', va='bottom')
     
     # Calculate improvement
-    nocache_time = stats[stats['operation'] == 'large_request_nocache']['mean'].iloc[0]
-    cache_time = stats[stats['operation'] == 'large_request_cached']['mean'].iloc[0]
+    nocache_time = stats.loc['large_request_nocache', 'mean']
+    cache_time = stats.loc['large_request_cached', 'mean']
     improvement = ((nocache_time - cache_time) / nocache_time) * 100
     
     ax.text(0.5, -0.15, 
@@ -265,15 +378,19 @@ def generate_performance_graphs():
 
     # 2. Response Time Distribution
     ax = axes[0, 1]
-    sns.boxplot(data=df, x='operation', y='response_time', ax=ax)
+    grouped = [(op, rt[idx]) for op, idx in df.groupby('operation', observed=True).indices.items()]
+    ax.boxplot([values for _, values in grouped])
     ax.set_title('Response Time Distribution')
     ax.set_ylabel('Response Time (seconds)')
-    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.set_xticklabels([op for op, _ in grouped], rotation=45, ha='right')
 
     # 3. Cache Hit Rate
     ax = axes[1, 0]
-    cache_stats = df.groupby('cache_hit').size()
-    cache_stats.plot(kind='pie', autopct='%.1f%%', ax=ax)
+    # Two possible values, so count hits/misses with bincount rather
+    # than a groupby
+    cache_arr = df['cache_hit'].to_numpy(dtype=np.uint8)
+    counts = np.bincount(cache_arr, minlength=2)
+    ax.pie(counts, labels=['Miss', 'Hit'], autopct='%.1f%%')
     ax.set_title('Cache Hit Rate')
     ax.set_ylabel('')
 
@@ -286,62 +403,65 @@ def generate_performance_graphs():
 
     # 5. Request Timeline
     ax = axes[2, 0]
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
-    df['response_time'].plot(ax=ax)
+    # Monotonic nanosecond ints convert to a relative-time axis in one
+    # vectorized pass; the shared rt array goes straight to matplotlib
+    ts = df['timestamp'].to_numpy()
+    ax.plot(pd.to_datetime(ts - ts[0], unit='ns'), rt)
     ax.set_title('Request Response Times Over Time')
     ax.set_ylabel('Response Time (seconds)')
 
     # 6. Error Rate
     ax = axes[2, 1]
-    error_rate = df[df['status_code'] >= 400].groupby('operation').size() / df.groupby('operation').size() * 100
+    # Mean of the 0/1 error flag gives the rate in one groupby scan
+    error_rate = (
+        df.assign(is_err=(df['status_code'] >= 400).astype('uint8'))
+        .groupby('operation', observed=True)['is_err']
+        .mean()
+        .mul(100)
+    )
     error_rate.plot(kind='bar', ax=ax)
     ax.set_title('Error Rate by Operation')
     ax.set_ylabel('Error Rate (%)')
     
     plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.savefig('performance_analysis.png')
+    # 120 dpi and a light deflate level keep the PNG encode cheap; this
+    # is a diagnostic figure, not a publication one
+    plt.savefig('performance_analysis.png', dpi=120, bbox_inches='tight',
+                pil_kwargs={'compress_level': 1})
     print("\nPerformance analysis saved to 'performance_analysis.png'")
-    for op in regular_ops['operation'].unique():
-        grouped_data.append(regular_ops[regular_ops['operation'] == op]['response_time'].values)
-        labels.append(op.replace('_', ' ').title())
-    
-    # Create box plot
-    plt.boxplot(grouped_data, labels=labels)
-    plt.title('Response Times by Operation Type (Excluding Large Requests)', fontsize=14, pad=20)
-    plt.xticks(rotation=45, ha='right')
-    plt.ylabel('Response Time (seconds)', fontsize=12)
-    
-    # Adjust layout
-    plt.tight_layout(pad=3.0)
-    plt.savefig('performance_analysis.png', bbox_inches='tight', dpi=300)
-    print("\nPerformance graphs saved as 'performance_analysis.png'")
 
 def print_performance_summary():
     """Print improved performance summary with detailed statistics"""
-    df = pd.DataFrame(performance_data)
     print("\nPerformance Summary:")
     print("-" * 50)
-    
-    # Calculate cache performance with more detail
-    cache_data = df[df['operation'].str.contains('large_request')]
-    nocache_stats = cache_data[cache_data['operation'] == 'large_request_nocache']['response_time']
-    cache_stats = cache_data[cache_data['operation'] == 'large_request_cached']['response_time']
-    
+
+    # A test run only produces a few dozen observations, so bucket the
+    # response times per operation in one pass and compute the statistics
+    # with numpy directly instead of building a DataFrame
+    buckets = defaultdict(list)
+    for op, rt, *_ in PERF_ROWS:
+        buckets[op].append(rt)
+    buckets = {op: np.asarray(v) for op, v in buckets.items()}
+
+    nocache_times = buckets.get('large_request_nocache', np.empty(0))
+    cached_times = buckets.get('large_request_cached', np.empty(0))
+
     print(f"\nLarge Request (10MB) Performance Analysis:")
-    print(f"First request (no cache): {nocache_stats.mean():.4f} seconds")
+    print(f"First request (no cache): {nocache_times.mean():.4f} seconds")
     print(f"Cached requests:")
-    print(f"  - Average: {cache_stats.mean():.4f} seconds")
-    print(f"  - Min: {cache_stats.min():.4f} seconds")
-    print(f"  - Max: {cache_stats.max():.4f} seconds")
-    print(f"  - Standard deviation: {cache_stats.std():.4f} seconds")
-    print(f"Cache speedup: {((nocache_stats.mean() - cache_stats.mean()) / nocache_stats.mean() * 100):.1f}%")
-    
+    print(f"  - Average: {cached_times.mean():.4f} seconds")
+    print(f"  - Min: {cached_times.min():.4f} seconds")
+    print(f"  - Max: {cached_times.max():.4f} seconds")
+    print(f"  - Standard deviation: {cached_times.std():.4f} seconds")
+    print(f"Cache speedup: {((nocache_times.mean() - cached_times.mean()) / nocache_times.mean() * 100):.1f}%")
+
     print("\nOther Operations (mean response times):")
-    regular_ops = df[~df['operation'].str.contains('large_request')]
-    summary = regular_ops.groupby('operation')['response_time'].agg(['count', 'mean', 'min', 'max', 'std'])
-    summary.columns = ['Count', 'Mean', 'Min', 'Max', 'Std Dev']
-    print(summary.round(4))
+    print(f"{'operation':<20} {'Count':>6} {'Mean':>8} {'Min':>8} {'Max':>8} {'Std Dev':>8}")
+    for op, times in buckets.items():
+        if op in ('large_request_nocache', 'large_request_cached'):
+            continue
+        print(f"{op:<20} {len(times):>6} {times.mean():>8.4f} "
+              f"{times.min():>8.4f} {times.max():>8.4f} {times.std():>8.4f}")
 
 if __name__ == "__main__":
     print("Starting enhanced test sequence...")
@@ -353,11 +473,17 @@ if __name__ == "__main__":
     # Test large request caching with multiple attempts
     test_large_request(3)
     
-    # Create and delete multiple users
+    # Create and retrieve multiple users
+    # (delete_users is commented out above, so no cleanup call here)
     created_users = create_test_users(5)
     users = get_users()
-    delete_users([user['id'] for user in created_users])
     
+    # Build the observations DataFrame once and split it here so the
+    # reporting functions never redo the conversion
+    df = pd.DataFrame(PERF_ROWS, columns=PERF_COLUMNS)
+    df['operation'] = df['operation'].astype('category')
+    is_large = df['operation'].isin(['large_request_cached', 'large_request_nocache'])
+
     # Generate performance analysis
-    generate_performance_graphs()
+    generate_performance_graphs(df, df[is_large])
     print_performance_summary()